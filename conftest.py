@@ -0,0 +1,12 @@
+import pytest
+import xml.etree.ElementTree as Et
+
+@pytest.fixture
+def root():
+    tree = Et.parse('drugbank_partial.xml')
+    root = tree.getroot()
+    return root
+
+@pytest.fixture
+def namespace():
+    return {'ns': 'http://www.drugbank.ca'}
@@ -1,47 +1,159 @@
 from textwrap import wrap
+from hashlib import sha1
+from collections import OrderedDict
+from types import MappingProxyType
 import numpy as np
 import pandas as pd
-import networkx as nx
 import plotly.express as px
+import plotly.graph_objects as go
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+
+
+# layouts are cached by a hash of the graph content, so redrawing the same graph doesn't recompute them
+# least recently used layouts are dropped once there are more than _LAYOUT_CACHE_SIZE of them
+_LAYOUT_CACHE_SIZE = 32
+_layout_cache = OrderedDict()
+
+
+def clear_layout_cache() -> None:
+    _layout_cache.clear()
+
+
+def force_layout(n: int, edges: np.ndarray, k: float = None, iterations: int = 50, seed: int = 42,
+                 chunk: int = 512) -> np.ndarray:
+    # Fruchterman-Reingold (the same model as nx.spring_layout) on numpy arrays
+    # repulsion is computed in blocks of rows so memory stays at chunk * n instead of n * n
+    # float32 halves the memory traffic of the n * n part, which is plenty of precision for a drawing
+    rng = np.random.default_rng(seed)
+    pos = rng.random((n, 2)).astype(np.float32)
+    if n < 2:
+        return np.zeros((n, 2))
+
+    k = k if k is not None else 1 / np.sqrt(n)
+    temperature = 0.1
+    cooling = temperature / (iterations + 1)
+
+    for _ in range(iterations):
+        displacement = np.zeros((n, 2), dtype=np.float32)
+        x, y = pos[:, 0], pos[:, 1]
+
+        # repulsion between every pair of nodes: k^2 / d along the direction between them
+        for start in range(0, n, chunk):
+            dx = x[start:start + chunk, None] - x[None, :]
+            dy = y[start:start + chunk, None] - y[None, :]
+            strength = dx * dx
+            strength += dy * dy
+            np.maximum(strength, 1e-6, out=strength)
+            np.divide(k * k, strength, out=strength)
+            displacement[start:start + chunk, 0] = np.einsum('ij,ij->i', dx, strength)
+            displacement[start:start + chunk, 1] = np.einsum('ij,ij->i', dy, strength)
+
+        # attraction along edges: d^2 / k
+        if len(edges):
+            delta = pos[edges[:, 0]] - pos[edges[:, 1]]
+            force = delta * (np.linalg.norm(delta, axis=1) / k)[:, None]
+            np.subtract.at(displacement, edges[:, 0], force)
+            np.add.at(displacement, edges[:, 1], force)
+
+        # move each node at most by the current temperature
+        length = np.maximum(np.linalg.norm(displacement, axis=1), 0.01)
+        pos += displacement * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+
+    # center and rescale to [-1, 1] like networkx does
+    pos = pos.astype(float)
+    pos -= pos.mean(axis=0)
+    return pos / max(np.abs(pos).max(), 1e-12)
+
+
+def bipartite_positions(left: list, right: list) -> np.ndarray:
+    # left nodes in a row on top, right nodes in a row below, both spread over [-1, 1]
+    def row(count, y):
+        x = np.linspace(-1, 1, count) if count > 1 else np.zeros(count)
+        return np.column_stack([x, np.full(count, y)])
+
+    return np.vstack([row(len(left), 0.5), row(len(right), -0.5)])
+
+
+def compute_layout(nodes: list, edges: list, kind: str = 'spring', left: list = None,
+                   **kwargs) -> MappingProxyType:
+    # returns a read-only {node: (x, y)}, computed once per (kind, nodes, edges, options) and then served
+    # from the cache - read-only so a caller moving nodes around can't corrupt later draws
+    nodes = sorted(set(nodes) | {node for edge in edges for node in edge}, key=repr)
+    key = sha1(repr((kind, nodes, sorted(edges, key=repr), sorted(left or [], key=repr),
+                     sorted(kwargs.items()))).encode()).hexdigest()
+
+    if key in _layout_cache:
+        _layout_cache.move_to_end(key)
+    else:
+        if kind == 'spring':
+            index = {node: i for i, node in enumerate(nodes)}
+            edge_index = np.array([[index[u], index[v]] for u, v in edges], dtype=int).reshape(-1, 2)
+            xy = force_layout(len(nodes), edge_index, **kwargs)
+        elif kind == 'bipartite':
+            left_set = set(left)
+            left_nodes = [node for node in nodes if node in left_set]
+            right_nodes = [node for node in nodes if node not in left_set]
+            nodes = left_nodes + right_nodes
+            xy = bipartite_positions(left_nodes, right_nodes)
+        else:
+            raise ValueError(f"Unknown layout kind: {kind}")
+
+        _layout_cache[key] = MappingProxyType(dict(zip(nodes, map(tuple, xy))))
+        if len(_layout_cache) > _LAYOUT_CACHE_SIZE:
+            _layout_cache.popitem(last=False)
+
+    return _layout_cache[key]
+
+
+def draw_graph_batched(ax, pos: dict, edges: list, node_colors, node_sizes, labels: dict = None,
+                       edge_colors='gray', edge_width: float = 1.2, font_size: int = 10,
+                       node_edge_color=None, label_limit: int = 300) -> None:
+    # all edges in one LineCollection and all nodes in one scatter call instead of per-node python loops
+    nodes = list(pos)
+    index = {node: i for i, node in enumerate(nodes)}
+    xy = np.array([pos[node] for node in nodes]).reshape(-1, 2)
+
+    segments = xy[np.array([[index[u], index[v]] for u, v in edges], dtype=int).reshape(-1, 2)]
+    ax.add_collection(LineCollection(segments, colors=edge_colors, linewidths=edge_width, zorder=1))
+    ax.scatter(xy[:, 0], xy[:, 1], s=node_sizes, c=node_colors, edgecolors=node_edge_color, zorder=2)
+
+    # text is the one thing matplotlib can't batch, so skip labels on huge graphs
+    if labels and len(labels) <= label_limit:
+        for node, label in labels.items():
+            x, y = pos[node]
+            ax.text(x, y, label, fontsize=font_size, ha='center', va='center', zorder=3)
+
+    # a bit of padding so the big nodes on the border aren't cut off
+    ax.margins(0.1)
+    ax.autoscale_view()
 
 
 def draw_synonyms(drug_bank_id: str, synonyms: pd.DataFrame) -> None:
     syns = synonyms.loc[drug_bank_id, 'synonyms']
     edge_list = [(drug_bank_id, syn) for syn in syns]
-    g = nx.from_edgelist(edge_list)
 
-    pos = nx.spring_layout(g, k=1, seed=42)
+    pos = compute_layout([drug_bank_id], edge_list, k=1, seed=42)
 
     # node sizes
     central_size = len(drug_bank_id) * 800
-    node_sizes = [central_size if node == drug_bank_id else central_size/2 for node in g]
+    node_sizes = [central_size if node == drug_bank_id else central_size/2 for node in pos]
 
     # drawing nodes and edges
     plt.figure(figsize=(12, 10))  # Larger area for better readability
-    nx.draw_networkx_edges(g, pos, edge_color="gray", width=1.2)
-    nx.draw_networkx_nodes(g, pos, node_size=node_sizes, node_color="lightblue", edgecolors="darkblue")
+    ax = plt.gca()
+    draw_graph_batched(ax, pos, edge_list, node_colors="lightblue", node_sizes=node_sizes,
+                       node_edge_color="darkblue")
 
     # labeling the central node (in the middle of the node):
-    nx.draw_networkx_labels(
-        g,
-        {drug_bank_id: pos[drug_bank_id]},  # Only the central node
-        {drug_bank_id: drug_bank_id},
-        font_size=10,
-        verticalalignment="center"
-    )
+    x, y = pos[drug_bank_id]
+    ax.text(x, y, drug_bank_id, fontsize=10, ha="center", va="center")
 
-    # labeling other nodes (under the nodes):
-
-    # first we shift the position of other nodes down by 0.2 of an inch
-    shifted_pos = {node: (x, y-0.2) for node, (x, y) in pos.items() if node != drug_bank_id}
-    nx.draw_networkx_labels(
-        g,
-        shifted_pos,
-        labels={node: node for node in shifted_pos},
-        font_size=10,
-        verticalalignment="top"
-    )
+    # labeling other nodes (under the nodes), shifted down by 0.2
+    for node, (x, y) in pos.items():
+        if node != drug_bank_id:
+            ax.text(x, y - 0.2, node, fontsize=10, ha="center", va="top")
 
     # showing the graph
     plt.axis("off")
@@ -50,31 +162,23 @@ def draw_synonyms(drug_bank_id: str, synonyms: pd.DataFrame) -> None:
 
 
 def draw_bipartite_graph(pathways: pd.DataFrame) -> None:
-    # Empty graph
-    b = nx.Graph()
-
     # first we designate the id nodes as left
     left_nodes = list(pathways['smpdb-id'])
 
-    # we add left nodes with the 'bipartite' tag set to 0 to represent one side of the graph
-    b.add_nodes_from(left_nodes, bipartite=0)
-
-    # we add the edges, which adds missing right nodes
+    # the edges bring in the right (drug) nodes
     edges = [(name, drug) for name, drugs in zip(pathways['smpdb-id'], pathways['drugs']) for drug in drugs]
-    b.add_edges_from(edges)
-
-    # calculate a bipartite layout for the nodes
-    pos = nx.bipartite_layout(b, left_nodes)
 
-    # Swap x and y coordinates to make vertical stacks horizontal
-    for node in pos:
-        pos[node] = (pos[node][1], -pos[node][0])  # Swap x and y coordinates
+    # cached bipartite layout, ids in a row on top and drugs in a row below
+    pos = compute_layout(left_nodes, edges, kind='bipartite', left=left_nodes)
 
     # draw the graph
+    left_set = set(left_nodes)
     plt.figure(figsize=(16, 8))
-    nx.draw(b, pos, with_labels=True,
-            node_color=['lightblue' if node in left_nodes else 'lightcoral' for node in b.nodes()],
-            edge_color='gray', node_size=4000, font_size=9)
+    ax = plt.gca()
+    draw_graph_batched(ax, pos, edges,
+                       node_colors=['lightblue' if node in left_set else 'lightcoral' for node in pos],
+                       node_sizes=4000, labels={node: node for node in pos}, font_size=9)
+    plt.axis("off")
     plt.show()  # (5) done
 
 
@@ -224,20 +328,16 @@ def draw_gene_relations(gene_name: str, targets: pd.DataFrame, products: pd.Data
     def wrap_labels(label, width=12):
         return "\n".join(wrap(label, width, break_long_words=False))
 
-    # Create a graph
-    G = nx.Graph()
-
-    node_number = 0
-
-    # Add nodes
-    G.add_node(node_number, label=gene_name, type="gene")
+    # nodes: 0 is the gene, then drugs, then products
+    labels = {0: gene_name}
+    node_types = ["gene"]
 
-    for a in attackers_list:
-        node_number += 1
-        G.add_node(node_number, label=wrap_labels(a), type="drug")
-    for p in product_list:
-        node_number += 1
-        G.add_node(node_number, label=wrap_labels(p), type="product")
+    for i, a in enumerate(attackers_list):
+        labels[i + 1] = wrap_labels(a)
+        node_types.append("drug")
+    for i, p in enumerate(product_list):
+        labels[i + len(attackers_list) + 1] = wrap_labels(p)
+        node_types.append("product")
 
     # Add edges with relationship labels
     edges = {
@@ -252,46 +352,109 @@ def draw_gene_relations(gene_name: str, targets: pd.DataFrame, products: pd.Data
     }
 
     # Define node colors
-    color_map = []
-    for node in G:
-        if G.nodes[node]["type"] == "gene":
-            # color_map.append("red")
-            color_map.append("#9370DB")  # purple
-        elif G.nodes[node]["type"] == "drug":
-            # color_map.append("blue")
-            color_map.append("#66b3ff")  # light blue
-        else:
-            # color_map.append("green")
-            color_map.append("#99cc99")  # light green
+    node_colors = {
+        "gene": "#9370DB",  # purple
+        "drug": "#66b3ff",  # light blue
+        "product": "#99cc99"  # light green
+    }
 
-    # Add edges to the graph
-    for key, edge_list in edges.items():
-        G.add_edges_from(edge_list)
+    edge_list = [edge for edge_list in edges.values() for edge in edge_list]
+    pos = compute_layout(list(labels), edge_list, seed=42)
 
-    pos = nx.spring_layout(G, seed=42)
+    # Draw nodes and edges with specific colors
+    plt.figure(figsize=(16, 12))
+    ax = plt.gca()
+    draw_graph_batched(ax, pos, edge_list,
+                       node_colors=[node_colors[node_types[node]] for node in pos],
+                       node_sizes=4000,
+                       labels=labels,
+                       edge_colors=[edge_colors[relation] for relation, edge_list in edges.items() for _ in edge_list],
+                       edge_width=2)
+    plt.axis("off")
+    plt.show()
 
-    # Pobranie etykiet do wyświetlenia
-    labels = nx.get_node_attributes(G, "label")
 
-    # Draw nodes
-    plt.figure(figsize=(16, 12))
-    nx.draw(G, pos, with_labels=True, labels=labels, node_color=color_map, node_size=4000, edge_color='gray',
-            font_size=10)
+def sample_prices(prices: pd.DataFrame, hover_points: int = 1000, seed: int = 42) -> pd.DataFrame:
+    # the random subset of rows that keeps its full hover description in the webgl and density modes
+    return prices.sample(n=min(hover_points, len(prices)), random_state=seed)
 
-    # Draw edges with specific colors
-    for relation, edge_list in edges.items():
-        nx.draw_networkx_edges(G, pos, edgelist=edge_list, edge_color=edge_colors[relation], width=2)
 
-    plt.show()
+def sample_price_hover(prices: pd.DataFrame, hover_points: int = 1000, seed: int = 42) -> pd.Series:
+    # full description only for a random subset, the rest get an empty hover label -> html size stays bounded
+    sample = sample_prices(prices, hover_points, seed).index
+    hover = pd.Series("", index=prices.index)
+    hover[sample] = prices.loc[sample, "description"]
+    return hover
+
+
+def price_density_traces(prices: pd.DataFrame, bins: int = 100, logarithmic: bool = True,
+                         hover_points: int = 1000, seed: int = 42) -> list:
+    # pre-binning into a (log-log) 2d histogram drawn as a heatmap coloured by log10(count),
+    # plus a small sample of real points that keep their hover description
+
+    # histogram2d can't bin nan / inf (e.g. a missing cost) and log scale can't show values <= 0
+    amount, cost = prices["amount"].to_numpy(float), prices["cost"].to_numpy(float)
+    keep = np.isfinite(amount) & np.isfinite(cost)
+    if logarithmic:
+        keep &= (amount > 0) & (cost > 0)
+    prices = prices[keep]
+    x, y = amount[keep], cost[keep]
+    if logarithmic:
+        x, y = np.log10(x), np.log10(y)
+
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    if logarithmic:
+        x_edges, y_edges = 10 ** x_edges, 10 ** y_edges
+
+    # heatmap rows are y, empty cells are left transparent
+    counts = counts.T
+    with np.errstate(divide="ignore"):
+        z = np.where(counts > 0, np.log10(counts), np.nan)
+
+    density = go.Heatmap(
+        x=x_edges, y=y_edges, z=z, text=counts.astype(int), name="price density",
+        colorscale="Viridis", colorbar=dict(title="log10(count)"),
+        hovertemplate="%{text} prices<extra></extra>"
+    )
+
+    sample = sample_prices(prices, hover_points, seed)
+    sampled = go.Scattergl(
+        x=sample["amount"], y=sample["cost"], mode="markers", name="sampled prices",
+        marker=dict(size=4, color="black", opacity=0.5),
+        text=sample["description"], hoverinfo="text+x+y"
+    )
+
+    return [density, sampled]
 
 
 def draw_interactive_price_plot(prices: pd.DataFrame, x_grid:bool=False, y_grid:bool=False,
-                                logarithmic:bool=True, scale:float=1.0) -> None:
-    fig = px.scatter(prices, x="amount", y="cost",
-                     color="unit",  # Kolorowanie według typu jednostki
-                     title="Interactive Scatter Plot of Drug Prices",
-                     labels={"amount": "Amount", "cost": "Price", "unit": "Unit Type"},
-                     hover_name="description")
+                                logarithmic:bool=True, scale:float=1.0, mode:str="auto",
+                                max_svg_points:int=1000, max_webgl_points:int=100000, hover_points:int=1000,
+                                bins:int=100, seed:int=42) -> None:
+    # mode: "svg" - every row as an svg point with its full description,
+    #       "webgl" - every row through Scattergl, hover description only for a sample of hover_points rows,
+    #       "density" - log-log 2d histogram + hover_points sampled rows, size doesn't depend on len(prices)
+    #       "auto" - svg up to max_svg_points rows (1000, where plotly itself switches to webgl),
+    #                webgl up to max_webgl_points rows, density above that
+    if mode == "auto":
+        if len(prices) <= max_svg_points:
+            mode = "svg"
+        else:
+            mode = "webgl" if len(prices) <= max_webgl_points else "density"
+
+    if mode in ["svg", "webgl"]:
+        hover = prices["description"] if mode == "svg" else sample_price_hover(prices, hover_points, seed)
+        fig = px.scatter(prices.assign(hover=hover), x="amount", y="cost",
+                         color="unit",  # Kolorowanie według typu jednostki
+                         title="Interactive Scatter Plot of Drug Prices",
+                         labels={"amount": "Amount", "cost": "Price", "unit": "Unit Type"},
+                         hover_name="hover", render_mode=mode)
+        fig.update_traces(marker=dict(size=10, opacity=0.7))
+    elif mode == "density":
+        fig = go.Figure(price_density_traces(prices, bins, logarithmic, hover_points, seed))
+        fig.update_layout(title="Density of Drug Prices")
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
 
     if logarithmic:
         fig.update_yaxes(type="log", title="Price in USD (Log Scale)", showgrid=y_grid)
@@ -302,5 +465,4 @@ def draw_interactive_price_plot(prices: pd.DataFrame, x_grid:bool=False, y_grid:
 
     fig.update_layout(width=int(1600 * scale), height=int(1000 * scale))
 
-    fig.update_traces(marker=dict(size=10, opacity=0.7))
-    fig.show()
\ No newline at end of file
+    fig.show()
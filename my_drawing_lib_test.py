@@ -0,0 +1,236 @@
+import pytest
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection, PathCollection
+from matplotlib.colors import to_rgba
+import plotly.graph_objects as go
+import my_drawing_lib
+
+
+@pytest.fixture(autouse=True)
+def empty_layout_cache():
+    my_drawing_lib.clear_layout_cache()
+    yield
+    my_drawing_lib.clear_layout_cache()
+
+
+@pytest.fixture
+def shown_axes(monkeypatch):
+    # plt.show replaced by something that remembers the axes that would have been shown
+    axes = []
+    monkeypatch.setattr(plt, 'show', lambda *args, **kwargs: axes.append(plt.gca()))
+    yield axes
+    plt.close('all')
+
+
+def drawn(ax):
+    lines = [c for c in ax.collections if isinstance(c, LineCollection)]
+    nodes = [c for c in ax.collections if isinstance(c, PathCollection)]
+    assert len(lines) == 1 and len(nodes) == 1
+    return lines[0], nodes[0]
+
+
+def test_compute_layout_cache():
+    edges = [('a', 'b'), ('b', 'c'), ('c', 'a')]
+    pos = my_drawing_lib.compute_layout(['a'], edges)
+    assert my_drawing_lib.compute_layout(['a'], list(reversed(edges))) is pos
+    assert len(my_drawing_lib._layout_cache) == 1
+
+    changed = my_drawing_lib.compute_layout(['a'], edges + [('c', 'd')])
+    assert changed is not pos
+    assert len(my_drawing_lib._layout_cache) == 2
+
+
+def test_compute_layout_read_only():
+    pos = my_drawing_lib.compute_layout(['a'], [('a', 'b')])
+    with pytest.raises(TypeError):
+        pos['a'] = (0, 0)
+
+
+def test_compute_layout_cache_is_bounded():
+    for i in range(my_drawing_lib._LAYOUT_CACHE_SIZE + 5):
+        my_drawing_lib.compute_layout([i], [], kind='bipartite', left=[i])
+    assert len(my_drawing_lib._layout_cache) == my_drawing_lib._LAYOUT_CACHE_SIZE
+
+
+def test_force_layout():
+    rng = np.random.default_rng(0)
+    edges = rng.integers(0, 200, (400, 2))
+    pos = my_drawing_lib.force_layout(200, edges)
+    assert pos.shape == (200, 2)
+    assert np.isfinite(pos).all()
+    assert np.abs(pos).max() <= 1 + 1e-9
+
+
+def test_force_layout_small_and_no_edges():
+    assert my_drawing_lib.force_layout(0, np.empty((0, 2), dtype=int)).shape == (0, 2)
+    assert my_drawing_lib.force_layout(1, np.empty((0, 2), dtype=int)).tolist() == [[0, 0]]
+
+    pos = my_drawing_lib.force_layout(10, np.empty((0, 2), dtype=int))
+    assert np.isfinite(pos).all()
+    assert np.abs(pos).max() <= 1 + 1e-9
+
+
+def test_bipartite_positions():
+    pos = my_drawing_lib.bipartite_positions(['a', 'b', 'c'], ['x', 'y'])
+    assert pos.shape == (5, 2)
+    assert (pos[:3, 1] == 0.5).all()
+    assert (pos[3:, 1] == -0.5).all()
+
+
+def test_draw_graph_batched():
+    edges = [('a', 'b'), ('b', 'c'), ('c', 'a'), ('c', 'd')]
+    pos = my_drawing_lib.compute_layout(['a'], edges)
+    fig, ax = plt.subplots()
+    my_drawing_lib.draw_graph_batched(ax, pos, edges, node_colors='blue', node_sizes=10,
+                                      labels={node: node for node in pos})
+    lines, nodes = drawn(ax)
+    assert len(lines.get_segments()) == len(edges)
+    assert len(nodes.get_offsets()) == len(pos)
+    assert sorted(text.get_text() for text in ax.texts) == ['a', 'b', 'c', 'd']
+
+    # segments go between the positions of the edge's nodes
+    for (u, v), segment in zip(edges, lines.get_segments()):
+        assert np.allclose(segment, [pos[u], pos[v]])
+    plt.close(fig)
+
+
+def test_draw_graph_batched_skips_labels_above_limit():
+    edges = [(0, i) for i in range(1, 20)]
+    pos = my_drawing_lib.compute_layout([0], edges)
+    fig, ax = plt.subplots()
+    my_drawing_lib.draw_graph_batched(ax, pos, edges, node_colors='blue', node_sizes=10,
+                                      labels={node: str(node) for node in pos}, label_limit=10)
+    assert len(ax.texts) == 0
+    plt.close(fig)
+
+
+def test_draw_gene_relations(shown_axes):
+    drugs = pd.DataFrame({'name': ['Drug A', 'Drug B', 'Drug C']}, index=['DB00001', 'DB00002', 'DB00003'])
+    targets = pd.DataFrame({'drug id': ['DB00001', 'DB00002', 'DB00003'], 'gene name': ['F2', 'F2', 'EGFR']})
+    products = pd.DataFrame({'id': ['DB00001', 'DB00001', 'DB00002', 'DB00003'],
+                             'name': ['Product 1', 'Product 2', 'Product 3', 'Product 4']})
+
+    my_drawing_lib.draw_gene_relations('F2', targets, products, drugs)
+    lines, nodes = drawn(shown_axes[0])
+
+    # gene + 2 drugs + 3 products, 2 gene-drug edges + 3 drug-product edges
+    assert len(nodes.get_offsets()) == 6
+    assert len(lines.get_segments()) == 5
+    colors = [tuple(color) for color in nodes.get_facecolors()]
+    assert colors.count(to_rgba('#9370DB')) == 1
+    assert colors.count(to_rgba('#66b3ff')) == 2
+    assert colors.count(to_rgba('#99cc99')) == 3
+
+    # edges touching the gene node are the gene_target ones
+    gene_xy = nodes.get_offsets()[colors.index(to_rgba('#9370DB'))]
+    for segment, color in zip(lines.get_segments(), lines.get_colors()):
+        touches_gene = np.allclose(segment[0], gene_xy) or np.allclose(segment[1], gene_xy)
+        assert tuple(color) == to_rgba('#66b3ff' if touches_gene else '#99cc99')
+
+
+def test_draw_bipartite_graph(shown_axes):
+    pathways = pd.DataFrame({'smpdb-id': ['SMP1', 'SMP2'], 'drugs': [['Drug A', 'Drug B'], ['Drug B', 'Drug C']]})
+    my_drawing_lib.draw_bipartite_graph(pathways)
+    lines, nodes = drawn(shown_axes[0])
+    assert len(nodes.get_offsets()) == 5
+    assert len(lines.get_segments()) == 4
+    assert (nodes.get_offsets()[:, 1] == 0.5).sum() == 2
+    assert len(shown_axes[0].texts) == 5
+
+
+def make_prices(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'description': [f'Drug {i} 10 mg tablet' for i in range(n)],
+        'cost': 10 ** rng.normal(1, 1, n),
+        'unit': rng.choice(['tablet', 'ml'], n),
+        'amount': 10 ** rng.normal(1, 1, n),
+    })
+
+
+def test_sample_price_hover():
+    prices = make_prices(5000)
+    hover = my_drawing_lib.sample_price_hover(prices, hover_points=300)
+    assert (hover != '').sum() == 300
+    assert (hover[hover != ''] == prices.loc[hover != '', 'description']).all()
+
+    # fewer rows than hover_points -> everything keeps its label
+    assert (my_drawing_lib.sample_price_hover(prices.head(100), hover_points=300) != '').sum() == 100
+
+
+def test_price_density_size_is_bounded():
+    small = go.Figure(my_drawing_lib.price_density_traces(make_prices(10000), bins=50))
+    large = go.Figure(my_drawing_lib.price_density_traces(make_prices(200000), bins=50))
+    assert len(large.to_json()) < 1.5 * len(small.to_json())
+
+    heatmap, sampled = large.data
+    assert np.asarray(heatmap.z).shape == (50, 50)
+    assert len(sampled.x) == 1000
+
+
+def test_price_density_drops_non_positive_in_log_mode():
+    prices = make_prices(1000)
+    prices.loc[:99, 'amount'] = 0
+    prices.loc[100:149, 'cost'] = -1
+
+    heatmap, sampled = my_drawing_lib.price_density_traces(prices, bins=20, hover_points=2000)
+    assert np.asarray(heatmap.text).sum() == 850
+    assert len(sampled.x) == 850
+    assert (np.asarray(sampled.x) > 0).all() and (np.asarray(sampled.y) > 0).all()
+
+    heatmap, sampled = my_drawing_lib.price_density_traces(prices, bins=20, logarithmic=False, hover_points=2000)
+    assert np.asarray(heatmap.text).sum() == 1000
+
+
+def test_price_density_drops_non_finite():
+    prices = make_prices(5)
+    prices.loc[0, 'cost'] = np.nan
+    prices.loc[1, 'amount'] = np.inf
+
+    for logarithmic in [True, False]:
+        heatmap, sampled = my_drawing_lib.price_density_traces(prices, bins=5, logarithmic=logarithmic)
+        assert np.asarray(heatmap.text).sum() == 3
+        assert len(sampled.x) == 3
+
+
+@pytest.fixture
+def shown_figure(monkeypatch):
+    figures = []
+    monkeypatch.setattr(go.Figure, 'show', lambda self, *args, **kwargs: figures.append(self))
+    return figures
+
+
+@pytest.mark.parametrize('rows, expected', [
+    (1000, {'scatter'}),
+    (1001, {'scattergl'}),
+    (5000, {'scattergl'}),
+    (5001, {'heatmap', 'scattergl'}),
+])
+def test_draw_interactive_price_plot_auto_mode(shown_figure, rows, expected):
+    my_drawing_lib.draw_interactive_price_plot(make_prices(rows), max_svg_points=1000, max_webgl_points=5000)
+    assert {trace.type for trace in shown_figure[0].data} == expected
+
+
+def test_draw_interactive_price_plot_default_thresholds(shown_figure):
+    my_drawing_lib.draw_interactive_price_plot(make_prices(1000))
+    my_drawing_lib.draw_interactive_price_plot(make_prices(1001))
+    assert {trace.type for trace in shown_figure[0].data} == {'scatter'}
+    assert {trace.type for trace in shown_figure[1].data} == {'scattergl'}
+
+
+def test_draw_interactive_price_plot_explicit_modes(shown_figure):
+    prices = make_prices(200)
+    my_drawing_lib.draw_interactive_price_plot(prices, mode='webgl', hover_points=50)
+    webgl = shown_figure[0]
+    assert {trace.type for trace in webgl.data} == {'scattergl'}
+    assert sum(label != '' for trace in webgl.data for label in trace.hovertext) == 50
+
+    my_drawing_lib.draw_interactive_price_plot(prices, mode='svg')
+    assert {trace.type for trace in shown_figure[1].data} == {'scatter'}
+
+    with pytest.raises(ValueError):
+        my_drawing_lib.draw_interactive_price_plot(prices, mode='canvas')
@@ -194,6 +194,83 @@ def summarise_drug_approval_status(drug_approval_status: pd.DataFrame) -> pd.Dat
     return summary
 
 
+FACET_NAMES = ['group', 'state', 'route', 'country', 'gene']
+
+
+def extract_drug_facets(root, ns) -> dict:
+    # every drug gets a bit position, every facet value gets a python int used as a bitset over those positions
+    # -> boolean combinations are just & | ~ on ints and counts are popcounts, no pandas involved
+    facets = {'drug ids': [], **{facet: {} for facet in FACET_NAMES}}
+
+    def add(facet, value, bit):
+        if value:
+            # groups are lowercased the same way as in extract_drug_approval_status
+            value = value.strip().lower() if facet == 'group' else value.strip()
+            facets[facet][value] = facets[facet].get(value, 0) | bit
+
+    for position, drug in enumerate(root):
+        bit = 1 << position
+        facets['drug ids'].append(drug.find('ns:drugbank-id', ns).text)
+
+        groups = drug.find('ns:groups', ns)
+        for group in groups if groups is not None else []:
+            add('group', group.text, bit)
+
+        state = drug.find('ns:state', ns)
+        add('state', state.text if state is not None else None, bit)
+
+        products = drug.find('ns:products', ns)
+        for product in products if products is not None else []:
+            add('route', product.find('ns:route', ns).text, bit)
+            add('country', product.find('ns:country', ns).text, bit)
+
+        targets = drug.find('ns:targets', ns)
+        for target in targets if targets is not None else []:
+            poly = target.find('ns:polypeptide', ns)
+            if poly is not None:
+                add('gene', poly.find('ns:gene-name', ns).text, bit)
+
+    facets['all'] = (1 << len(facets['drug ids'])) - 1
+    return facets
+
+
+def query_facets(facets: dict, require: dict = None, exclude: dict = None) -> int:
+    # values inside one facet are OR-ed, facets are AND-ed, excluded values are removed at the end
+    # e.g. approved AND NOT withdrawn AND targets gene X:
+    #   query_facets(facets, require={'group': ['approved'], 'gene': ['X']}, exclude={'group': ['withdrawn']})
+    mask = facets['all']
+
+    for facet, values in (require or {}).items():
+        any_of = 0
+        for value in values:
+            any_of |= facets[facet].get(value, 0)
+        mask &= any_of
+
+    for facet, values in (exclude or {}).items():
+        for value in values:
+            mask &= ~facets[facet].get(value, 0)
+
+    return mask
+
+
+def count_facets(facets: dict, mask: int, names: list = None, top: int = None) -> dict:
+    # cross-filter counts: how many drugs of the current selection have each value of each facet
+    # names limits which facets are counted, top keeps only the `top` most common values of each
+    counts = {}
+    for facet in names if names is not None else FACET_NAMES:
+        values = {value: (bits & mask).bit_count() for value, bits in facets[facet].items() if bits & mask}
+        if top is not None:
+            values = dict(sorted(values.items(), key=lambda item: item[1], reverse=True)[:top])
+        counts[facet] = values
+    return counts
+
+
+def facet_drug_ids(facets: dict, mask: int) -> list:
+    # bin() reversed so that string index == bit position
+    ids = facets['drug ids']
+    return [ids[position] for position, bit in enumerate(bin(mask)[:1:-1]) if bit == '1']
+
+
 def extract_drug_interactions(root, ns) -> pd.DataFrame:
     drug_interactions = [
         {
@@ -1,18 +1,7 @@
-import pytest
 import pandas as pd
 import my_lib
 import xml.etree.ElementTree as Et
 
-@pytest.fixture
-def root():
-    tree = Et.parse('drugbank_partial.xml')
-    root = tree.getroot()
-    return root
-
-@pytest.fixture
-def namespace():
-    return {'ns': 'http://www.drugbank.ca'}
-
 
 def test_int_to_db_string():
     assert my_lib.int_to_db_string(123) == "DB00123"
@@ -83,4 +72,69 @@ def test_extract_drug_interactions(root, namespace):
     result = my_lib.extract_drug_interactions(root, namespace)
     assert isinstance(result , pd.DataFrame)
     assert result.shape[0] == 50688
-    assert result.shape[1] == 5
\ No newline at end of file
+    assert result.shape[1] == 5
+
+
+def test_extract_drug_facets(root, namespace):
+    facets = my_lib.extract_drug_facets(root, namespace)
+    summary = my_lib.summarise_drug_approval_status(my_lib.extract_drug_approval_status(root, namespace))
+    assert len(facets['drug ids']) == 100
+    assert facets['all'].bit_count() == 100
+    for status, number in zip(summary['status'], summary['number of drugs']):
+        assert facets['group'].get(status, 0).bit_count() == number
+
+
+def test_extract_drug_facets_other_facets(root, namespace):
+    facets = my_lib.extract_drug_facets(root, namespace)
+    drugs = my_lib.extract_drugs(root, namespace)
+    products = my_lib.extract_products(root, namespace)
+    targets = my_lib.extract_targets(root, namespace)
+
+    # number of distinct drugs per value, the same thing the bitsets count
+    expected = {
+        'state': drugs['state'].dropna().value_counts(),
+        'route': products.dropna(subset=['route']).groupby('route')['id'].nunique(),
+        'country': products.dropna(subset=['country']).groupby('country')['id'].nunique(),
+        'gene': targets.dropna(subset=['gene name']).groupby('gene name')['drug id'].nunique(),
+    }
+    for facet, counts in expected.items():
+        assert {value: bits.bit_count() for value, bits in facets[facet].items()} == counts.to_dict()
+
+
+def test_query_facets(root, namespace):
+    facets = my_lib.extract_drug_facets(root, namespace)
+    status = my_lib.extract_drug_approval_status(root, namespace)
+    mask = my_lib.query_facets(facets, require={'group': ['approved']}, exclude={'group': ['withdrawn']})
+    expected = status[status['approved'] & ~status['withdrawn']]['drug id']
+    assert my_lib.facet_drug_ids(facets, mask) == list(expected)
+    assert my_lib.count_facets(facets, mask)['group']['approved'] == len(expected)
+    assert my_lib.query_facets(facets) == facets['all']
+
+
+def test_query_facets_or_within_facet(root, namespace):
+    facets = my_lib.extract_drug_facets(root, namespace)
+    status = my_lib.extract_drug_approval_status(root, namespace)
+    mask = my_lib.query_facets(facets, require={'group': ['approved', 'experimental']})
+    expected = status[status['approved'] | status['experimental']]['drug id']
+    assert my_lib.facet_drug_ids(facets, mask) == list(expected)
+
+
+def test_extract_drug_facets_missing_groups(namespace):
+    root = Et.fromstring(
+        '<drugbank xmlns="http://www.drugbank.ca">'
+        '<drug><drugbank-id>DB00001</drugbank-id><state>solid</state></drug>'
+        '<drug><drugbank-id>DB00002</drugbank-id><groups><group>approved</group></groups></drug>'
+        '</drugbank>'
+    )
+    facets = my_lib.extract_drug_facets(root, namespace)
+    assert facets['drug ids'] == ['DB00001', 'DB00002']
+    assert facets['group'] == {'approved': 0b10}
+    assert facets['state'] == {'solid': 0b01}
+
+
+def test_count_facets_names_and_top(root, namespace):
+    facets = my_lib.extract_drug_facets(root, namespace)
+    full = my_lib.count_facets(facets, facets['all'])
+    limited = my_lib.count_facets(facets, facets['all'], names=['gene'], top=3)
+    assert list(limited) == ['gene']
+    assert list(limited['gene'].values()) == sorted(full['gene'].values(), reverse=True)[:3]
@@ -0,0 +1,292 @@
+from typing import NamedTuple, Optional, get_args
+from itertools import islice
+import xml.etree.ElementTree as Et
+
+# pandas-free version of the my_lib.extract_* functions: records are yielded one drug at a time straight
+# from iterparse, so memory stays flat no matter how big the xml is. pandas / pyarrow are only imported
+# by the adapters at the bottom, when someone actually wants a DataFrame or a RecordBatch.
+# Record fields are python identifiers (drug_id, gene_name, ...), batch_to_dataframe renames them back to
+# the my_lib column names ('drug id', 'gene name', ...) so its frames can go into the existing my_lib /
+# my_drawing_lib functions. Arrow batches keep the field names.
+
+NAMESPACE = {'ns': 'http://www.drugbank.ca'}
+
+
+class DrugRecord(NamedTuple):
+    id: str
+    name: str
+    description: Optional[str]
+    state: Optional[str]
+    indication: Optional[str]
+    mechanism_of_action: Optional[str]
+    food_interactions: Optional[tuple]
+    groups: tuple
+
+
+class ProductRecord(NamedTuple):
+    drug_id: str
+    name: Optional[str]
+    labeller: Optional[str]
+    ndc_product_code: Optional[str]
+    dosage_form: Optional[str]
+    route: Optional[str]
+    strength: Optional[str]
+    country: Optional[str]
+    source: Optional[str]
+
+
+class TargetRecord(NamedTuple):
+    drug_id: str
+    target_id: str
+    source: Optional[str] = None
+    source_id: Optional[str] = None
+    polypeptide_name: Optional[str] = None
+    gene_name: Optional[str] = None
+    genatlas_id: Optional[str] = None
+    chromosome_location: Optional[str] = None
+    cellular_location: Optional[str] = None
+
+
+class InteractionRecord(NamedTuple):
+    drug_id: str
+    drug_name: str
+    interactee_id: str
+    interactee_name: str
+    description: Optional[str]
+
+
+class PriceRecord(NamedTuple):
+    drug_id: str
+    description: Optional[str]
+    cost: float
+    unit: Optional[str]
+
+
+class PathwayRecord(NamedTuple):
+    smpdb_id: str
+    name: str
+    category: Optional[str]
+    drug_ids: tuple
+
+
+def _text(element, path, ns):
+    found = element.find(path, ns)
+    return found.text if found is not None else None
+
+
+def _float(text):
+    # missing numbers become nan, same as astype(float) does in my_lib.extract_prices
+    return float(text) if text is not None else float('nan')
+
+
+def iter_drug_elements(source, ns=NAMESPACE):
+    # source can be an already parsed root (then we just walk it) or a path / file object to stream
+    if isinstance(source, Et.Element):
+        yield from source
+        return
+
+    # <drug> tags also appear inside pathways, so only the direct children of <drugbank> count
+    root = None
+    depth = 0
+    for event, element in Et.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            root = element if root is None else root
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 1:
+                yield element
+                root.clear()  # forget the drugs we already handled
+
+
+def drug_records(drug, ns=NAMESPACE):
+    food = drug.find('ns:food-interactions', ns)
+    groups = drug.find('ns:groups', ns)
+    yield DrugRecord(
+        id=_text(drug, 'ns:drugbank-id', ns),
+        name=_text(drug, 'ns:name', ns),
+        description=_text(drug, 'ns:description', ns),
+        state=_text(drug, 'ns:state', ns),
+        indication=_text(drug, 'ns:indication', ns),
+        mechanism_of_action=_text(drug, 'ns:mechanism-of-action', ns),
+        food_interactions=tuple(
+            interaction.text.strip()
+            for interaction in food
+            if interaction.text and interaction.text.strip()
+        ) if food is not None else None,
+        groups=tuple(group.text.lower() for group in groups) if groups is not None else ()
+    )
+
+
+def product_records(drug, ns=NAMESPACE):
+    drug_id = _text(drug, 'ns:drugbank-id', ns)
+    for product in drug.find('ns:products', ns):
+        yield ProductRecord(
+            drug_id=drug_id,
+            name=_text(product, 'ns:name', ns),
+            labeller=_text(product, 'ns:labeller', ns),
+            ndc_product_code=_text(product, 'ns:ndc-product-code', ns),
+            dosage_form=_text(product, 'ns:dosage-form', ns),
+            route=_text(product, 'ns:route', ns),
+            strength=_text(product, 'ns:strength', ns),
+            country=_text(product, 'ns:country', ns),
+            source=_text(product, 'ns:source', ns)
+        )
+
+
+def target_records(drug, ns=NAMESPACE):
+    drug_id = _text(drug, 'ns:drugbank-id', ns)
+    for target in drug.find('ns:targets', ns):
+        poly = target.find('ns:polypeptide', ns)
+        if poly is None:
+            yield TargetRecord(drug_id=drug_id, target_id=_text(target, 'ns:id', ns))
+            continue
+
+        genatlas_id = None
+        for e_id in poly.find('ns:external-identifiers', ns):
+            if e_id[0].text == 'GenAtlas':
+                genatlas_id = e_id[1].text
+                break
+
+        yield TargetRecord(
+            drug_id=drug_id,
+            target_id=_text(target, 'ns:id', ns),
+            source=poly.get('source'),
+            source_id=poly.get('id'),
+            polypeptide_name=_text(poly, 'ns:name', ns),
+            gene_name=_text(poly, 'ns:gene-name', ns),
+            genatlas_id=genatlas_id,
+            chromosome_location=_text(poly, 'ns:chromosome-location', ns),
+            cellular_location=_text(poly, 'ns:cellular-location', ns)
+        )
+
+
+def interaction_records(drug, ns=NAMESPACE):
+    drug_id = _text(drug, 'ns:drugbank-id', ns)
+    drug_name = _text(drug, 'ns:name', ns)
+    for interaction in drug.find('ns:drug-interactions', ns):
+        yield InteractionRecord(
+            drug_id=drug_id,
+            drug_name=drug_name,
+            interactee_id=_text(interaction, 'ns:drugbank-id', ns),
+            interactee_name=_text(interaction, 'ns:name', ns),
+            description=_text(interaction, 'ns:description', ns)
+        )
+
+
+def price_records(drug, ns=NAMESPACE):
+    drug_id = _text(drug, 'ns:drugbank-id', ns)
+    for price in drug.iterfind('.//ns:price', ns):
+        yield PriceRecord(
+            drug_id=drug_id,
+            description=_text(price, 'ns:description', ns),
+            cost=_float(_text(price, 'ns:cost', ns)),
+            unit=_text(price, 'ns:unit', ns)
+        )
+
+
+def pathway_records(drug, ns=NAMESPACE):
+    for pathway in drug.iterfind('.//ns:pathway', ns):
+        yield PathwayRecord(
+            smpdb_id=pathway[0].text,
+            name=pathway[1].text,
+            category=pathway[2].text,
+            drug_ids=tuple(
+                pathway_drug.find('ns:drugbank-id', ns).text
+                for pathway_drug in pathway.find('ns:drugs', ns).iter()
+                if pathway_drug.find('ns:drugbank-id', ns) is not None
+            )
+        )
+
+
+TABLES = {
+    'drugs': drug_records,
+    'products': product_records,
+    'targets': target_records,
+    'interactions': interaction_records,
+    'prices': price_records,
+    'pathways': pathway_records,
+}
+
+
+def iter_records(source, table: str, ns=NAMESPACE):
+    if table not in TABLES:
+        raise ValueError(f"Unknown table: {table}, expected one of {list(TABLES)}")
+
+    for drug in iter_drug_elements(source, ns):
+        yield from TABLES[table](drug, ns)
+
+
+def iter_batches(records, size: int = 10000):
+    # chunks any record iterator into lists of at most `size` records
+    records = iter(records)
+    while batch := list(islice(records, size)):
+        yield batch
+
+
+# record field -> my_lib.extract_* column, in the column order of the extract_* frame
+# fields that extract_* doesn't have (e.g. the drug id of a price) go at the end
+MY_LIB_COLUMNS = {
+    DrugRecord: {
+        'id': 'id', 'name': 'name', 'description': 'description', 'state': 'state', 'indication': 'indication',
+        'mechanism_of_action': 'mechanism of action', 'food_interactions': 'food interactions', 'groups': 'groups'
+    },
+    ProductRecord: {
+        'drug_id': 'id', 'name': 'name', 'labeller': 'labeller', 'ndc_product_code': 'ndc-product-code',
+        'dosage_form': 'dosage-form', 'route': 'route', 'strength': 'strength', 'country': 'country',
+        'source': 'source'
+    },
+    TargetRecord: {
+        'drug_id': 'drug id', 'target_id': 'target id', 'source': 'source', 'source_id': 'source id',
+        'polypeptide_name': 'polypeptide name', 'gene_name': 'gene name', 'genatlas_id': 'GenAtlas ID',
+        'chromosome_location': 'chromosome location', 'cellular_location': 'cellular location'
+    },
+    InteractionRecord: {
+        'drug_name': 'drug name', 'drug_id': 'drug id', 'interactee_name': 'interacts with',
+        'interactee_id': 'interactee id', 'description': 'interaction description'
+    },
+    PriceRecord: {'description': 'description', 'cost': 'cost', 'unit': 'unit', 'drug_id': 'drug id'},
+    PathwayRecord: {'smpdb_id': 'smpdb-id', 'name': 'name', 'category': 'category', 'drug_ids': 'drug ids'},
+}
+
+
+def batch_to_dataframe(batch: list, record_type=None, my_lib_columns: bool = True):
+    import pandas as pd
+
+    # record_type gives the columns for an empty batch
+    record_type = record_type if record_type is not None else type(batch[0]) if batch else None
+    if record_type is None:
+        return pd.DataFrame()
+
+    df = pd.DataFrame.from_records(batch, columns=record_type._fields)
+    if my_lib_columns:
+        columns = MY_LIB_COLUMNS[record_type]
+        df = df[list(columns)].rename(columns=columns)
+        if record_type is DrugRecord:
+            df = df.set_index('id')  # same as extract_drugs
+    return df
+
+
+def arrow_schema(record_type):
+    import pyarrow as pa
+
+    types = {str: pa.string(), float: pa.float64(), tuple: pa.list_(pa.string())}
+    fields = []
+    for name, annotation in record_type.__annotations__.items():
+        # Optional[x] -> x, arrow fields are nullable anyway
+        annotation = next((arg for arg in get_args(annotation) if arg is not type(None)), annotation)
+        fields.append(pa.field(name, types[annotation]))
+    return pa.schema(fields)
+
+
+def batch_to_arrow(batch: list, record_type=None):
+    import pyarrow as pa
+
+    # record_type gives the schema for an empty batch, without it an empty batch has no columns
+    record_type = record_type if record_type is not None else type(batch[0]) if batch else None
+    if record_type is None:
+        return pa.record_batch([], schema=pa.schema([]))
+
+    schema = arrow_schema(record_type)
+    arrays = [list(column) for column in zip(*batch)] if batch else [[] for _ in schema.names]
+    return pa.record_batch(arrays, schema=schema)
@@ -0,0 +1,112 @@
+import math
+import pytest
+import pandas as pd
+import my_lib
+import my_stream_lib
+import xml.etree.ElementTree as Et
+
+
+def test_iter_records_matches_extract(root, namespace):
+    assert len(list(my_stream_lib.iter_records('drugbank_partial.xml', 'drugs'))) == 100
+    assert len(list(my_stream_lib.iter_records('drugbank_partial.xml', 'products'))) == 4584
+    assert len(list(my_stream_lib.iter_records('drugbank_partial.xml', 'prices'))) == 499
+    assert len(list(my_stream_lib.iter_records('drugbank_partial.xml', 'interactions'))) == 50688
+    assert len(list(my_stream_lib.iter_records('drugbank_partial.xml', 'targets'))) == \
+           len(my_lib.extract_targets(root, namespace))
+    assert len(list(my_stream_lib.iter_records('drugbank_partial.xml', 'pathways'))) == \
+           len(my_lib.extract_pathways(root, namespace))
+
+
+def test_product_records_match_extract_products(root, namespace):
+    products = my_lib.extract_products(root, namespace)
+    expected = list(products.astype(object).where(products.notna(), None).itertuples(index=False, name=None))
+    streamed = [tuple(record) for record in my_stream_lib.iter_records('drugbank_partial.xml', 'products')]
+    assert streamed == expected
+
+
+def test_price_records_missing_cost():
+    drug = Et.fromstring(
+        '<drug xmlns="http://www.drugbank.ca"><drugbank-id>DB00001</drugbank-id><prices>'
+        '<price><description>Lepirudin 50 mg vial</description><unit>vial</unit></price>'
+        '</prices></drug>'
+    )
+    price = next(my_stream_lib.price_records(drug))
+    assert price.drug_id == 'DB00001'
+    assert math.isnan(price.cost)
+
+
+def test_iter_records_from_root(root):
+    streamed = list(my_stream_lib.iter_records('drugbank_partial.xml', 'drugs'))
+    assert list(my_stream_lib.iter_records(root, 'drugs')) == streamed
+    assert streamed[0].id == 'DB00001'
+    assert streamed[0].name == 'Lepirudin'
+
+
+def test_iter_records_unknown_table():
+    with pytest.raises(ValueError):
+        next(my_stream_lib.iter_records('drugbank_partial.xml', 'nope'))
+
+
+def test_iter_batches():
+    records = my_stream_lib.iter_records('drugbank_partial.xml', 'products')
+    batches = list(my_stream_lib.iter_batches(records, size=1000))
+    assert [len(batch) for batch in batches] == [1000, 1000, 1000, 1000, 584]
+
+
+def test_batch_to_dataframe():
+    batch = next(my_stream_lib.iter_batches(my_stream_lib.iter_records('drugbank_partial.xml', 'prices')))
+    result = my_stream_lib.batch_to_dataframe(batch)
+    assert isinstance(result, pd.DataFrame)
+    assert result.shape == (499, 4)
+
+    assert list(result.columns) == ['description', 'cost', 'unit', 'drug id']
+
+    empty = my_stream_lib.batch_to_dataframe([], my_stream_lib.PriceRecord)
+    assert list(empty.columns) == ['description', 'cost', 'unit', 'drug id']
+
+    raw = my_stream_lib.batch_to_dataframe(batch, my_lib_columns=False)
+    assert list(raw.columns) == list(my_stream_lib.PriceRecord._fields)
+
+
+@pytest.mark.parametrize('table, extract', [
+    ('targets', my_lib.extract_targets),
+    ('interactions', my_lib.extract_drug_interactions),
+    ('products', my_lib.extract_products),
+])
+def test_batch_to_dataframe_matches_extract(root, namespace, table, extract):
+    expected = extract(root, namespace)
+    records = list(my_stream_lib.iter_records('drugbank_partial.xml', table))
+    result = my_stream_lib.batch_to_dataframe(records)
+
+    assert list(result.columns) == list(expected.columns)
+    assert result.astype(object).where(result.notna(), None).values.tolist() == \
+           expected.astype(object).where(expected.notna(), None).values.tolist()
+
+
+def test_batch_to_dataframe_drugs_index(root, namespace):
+    expected = my_lib.extract_drugs(root, namespace)
+    result = my_stream_lib.batch_to_dataframe(list(my_stream_lib.iter_records('drugbank_partial.xml', 'drugs')))
+    assert list(result.index) == list(expected.index)
+    assert list(result.columns) == list(expected.columns) + ['groups']
+
+
+def test_batch_to_arrow():
+    pa = pytest.importorskip('pyarrow')
+    batch = next(my_stream_lib.iter_batches(my_stream_lib.iter_records('drugbank_partial.xml', 'drugs')))
+    result = my_stream_lib.batch_to_arrow(batch)
+    assert isinstance(result, pa.RecordBatch)
+    assert result.num_rows == 100
+    assert result.schema == my_stream_lib.arrow_schema(my_stream_lib.DrugRecord)
+    assert result.schema.field('groups').type == pa.list_(pa.string())
+    assert result.column('id')[0].as_py() == 'DB00001'
+
+
+def test_batch_to_arrow_empty():
+    pa = pytest.importorskip('pyarrow')
+    empty = my_stream_lib.batch_to_arrow([], my_stream_lib.PriceRecord)
+    assert empty.num_rows == 0
+    assert empty.schema == pa.schema([
+        ('drug_id', pa.string()), ('description', pa.string()), ('cost', pa.float64()), ('unit', pa.string())
+    ])
+
+    assert my_stream_lib.batch_to_arrow([]).num_columns == 0
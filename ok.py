@@ -1,7 +1,7 @@
 from fastapi import FastAPI
 from pydantic import BaseModel
 import pandas as pd
-from my_lib import extract_pathway_ids, extract_drugs
+from my_lib import extract_pathway_ids, extract_drugs, FACET_NAMES, extract_drug_facets, query_facets, count_facets, facet_drug_ids
 import xml.etree.ElementTree as Et
 
 
@@ -20,14 +20,37 @@ app = FastAPI()
 # Create a DataFrame from the given data
 df = extract_pathway_ids(root, namespace, drugs_df)
 
+# bitset facets (group / state / route / country / gene), built once at startup
+facets = extract_drug_facets(root, namespace)
+
 # Define request model
 class DrugRequest(BaseModel):
     drug_id: str
 
+class FacetRequest(BaseModel):
+    require: dict[str, list[str]] = {}
+    exclude: dict[str, list[str]] = {}
+    facets: list[str] = FACET_NAMES  # which facet counts to return
+    top: int = 20  # at most this many values per facet, there are thousands of genes
+    with_ids: bool = False
+
 # Define endpoint
 @app.post("/get_drug_count/")
 async def get_drug_count(request: DrugRequest):
     drug_id = request.drug_id
     if drug_id in df.index:
         return {"count": int(df.loc[drug_id, "count"])}
-    return {"error": "Drug not found"}
\ No newline at end of file
+    return {"error": "Drug not found"}
+
+
+@app.post("/facets/")
+async def get_facets(request: FacetRequest):
+    unknown = [facet for facet in [*request.require, *request.exclude, *request.facets] if facet not in FACET_NAMES]
+    if unknown:
+        return {"error": f"Unknown facets: {unknown}"}
+
+    mask = query_facets(facets, request.require, request.exclude)
+    response = {"count": mask.bit_count(), "facets": count_facets(facets, mask, request.facets, request.top)}
+    if request.with_ids:
+        response["ids"] = facet_drug_ids(facets, mask)
+    return response
@@ -0,0 +1,37 @@
+import pytest
+import my_lib
+
+fastapi = pytest.importorskip('fastapi')
+from fastapi.testclient import TestClient
+import ok
+
+client = TestClient(ok.app)
+
+
+def test_facets_endpoint(root, namespace):
+    status = my_lib.extract_drug_approval_status(root, namespace)
+    response = client.post('/facets/', json={'require': {'group': ['approved']}, 'exclude': {'group': ['withdrawn']},
+                                             'with_ids': True})
+    assert response.status_code == 200
+
+    result = response.json()
+    expected = status[status['approved'] & ~status['withdrawn']]['drug id']
+    assert set(result) == {'count', 'facets', 'ids'}
+    assert result['count'] == len(expected)
+    assert result['ids'] == list(expected)
+    assert set(result['facets']) == set(my_lib.FACET_NAMES)
+
+
+def test_facets_endpoint_limits_counts():
+    result = client.post('/facets/', json={'facets': ['gene', 'country'], 'top': 2}).json()
+    assert 'ids' not in result
+    assert set(result['facets']) == {'gene', 'country'}
+    assert all(len(values) <= 2 for values in result['facets'].values())
+
+    genes = list(client.post('/facets/', json={'facets': ['gene'], 'top': 1000}).json()['facets']['gene'].values())
+    assert list(result['facets']['gene'].values()) == genes[:2]
+
+
+def test_facets_endpoint_unknown_facet():
+    for request in [{'require': {'colour': ['red']}}, {'exclude': {'colour': ['red']}}, {'facets': ['colour']}]:
+        assert client.post('/facets/', json=request).json() == {'error': "Unknown facets: ['colour']"}